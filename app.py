@@ -236,7 +236,12 @@ class TwitterStreamWorker(core.Stack):
                 "SSM_PARAM_INITIAL_RUN": self.initial_run_parameter.parameter_name,
                 "TWITTER_KEYWORD": os.getenv("TWITTER_KEYWORD") or 'maga',
                 "SINCE_DATE": '2019-03-01',
-                "WORLD_ID": '23424977'
+                "WORLD_ID": '23424977',
+                "TREND_MODE": os.getenv("TREND_MODE") or 'false',
+                "TREND_MAX_KEYWORDS": os.getenv("TREND_MAX_KEYWORDS") or '5',
+                "TREND_REFRESH_SECONDS": os.getenv("TREND_REFRESH_SECONDS") or '900',
+                "TREND_ADD_VOLUME": os.getenv("TREND_ADD_VOLUME") or '10000',
+                "TREND_EVICT_VOLUME": os.getenv("TREND_EVICT_VOLUME") or '5000'
             },
             secrets=[
                 aws_ecs.Secret.from_secrets_manager(
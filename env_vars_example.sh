@@ -2,3 +2,8 @@ export STACK_NAME='maga-twitter-streamer'
 export ENVIRONMENT='development'
 export TWITTER_KEYWORD='maga'
 export TWITTER_SECRET_ARN='arn:aws:secretsmanager:us-west-2:accountnumber:secret:credential/path'
+export TREND_MODE='false'
+export TREND_MAX_KEYWORDS='5'
+export TREND_REFRESH_SECONDS='900'
+export TREND_ADD_VOLUME='10000'
+export TREND_EVICT_VOLUME='5000'
@@ -24,9 +24,20 @@ class SecretsManager(object):
 
 
 class Comprehend(object):
+    # DetectSentiment limit on the UTF-8 encoded size of Text
+    MAX_TEXT_BYTES = 5000
+
     def __init__(self):
         self.client = boto3.client('comprehend')
 
+    @classmethod
+    def truncate_text(cls, text):
+        # Cut to the byte limit without splitting a multi-byte character
+        encoded = text.encode('utf-8')
+        if len(encoded) <= cls.MAX_TEXT_BYTES:
+            return text
+        return encoded[:cls.MAX_TEXT_BYTES].decode('utf-8', 'ignore')
+
     def sentiment(self, tweet, retries=0):
         try:
             result = self.client.detect_sentiment(
@@ -60,6 +71,24 @@ class FireHose(object):
             }
         )
 
+    def send_to_firehose_batch(self, firehose_stream_name, records, retries=0, max_retries=5):
+        # Ship already serialized json records to firehose stream in a single call
+        response = self.client.put_record_batch(
+            DeliveryStreamName=firehose_stream_name,
+            Records=[{'Data': record} for record in records]
+        )
+        if not response.get('FailedPutCount'):
+            return response
+
+        # Records can fail individually (e.g. throttling) without the call raising, retry just those
+        failed = [record for record, result in zip(records, response['RequestResponses']) if result.get('ErrorCode')]
+        if retries >= max_retries:
+            raise RuntimeError("{} records failed to ship to firehose after {} retries".format(len(failed), retries))
+        print("WARNING: {} records failed to ship to firehose, backing off...".format(len(failed)))
+        retries = retries + 1
+        sleep(2 ** retries)
+        return self.send_to_firehose_batch(firehose_stream_name=firehose_stream_name, records=failed, retries=retries, max_retries=max_retries)
+
 
 class SQSQueue(object):
     def __init__(self):
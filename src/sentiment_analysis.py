@@ -5,16 +5,79 @@ from os import getenv
 from botocore.exceptions import ClientError
 from aws import Comprehend, FireHose, S3
 from json import JSONDecodeError
+from collections import Counter
 import json
 import boto3
 
+# Firehose PutRecordBatch limits
+FIREHOSE_BATCH_RECORDS = 500
+FIREHOSE_BATCH_BYTES = 4 * 1024 * 1024
+
+# Sentiment marker for texts that were never sent to comprehend
+UNSCORED = "UNSCORED"
+
+# The only raw tweet fields the curated record is built from
+TWEET_FIELDS = frozenset(('created_at', 'id', 'full_text', 'retweeted_status'))
+
+
+_encode_record = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def prune_tweet_fields(pairs):
+    return {key: value for key, value in pairs if key in TWEET_FIELDS}
+
+
+class CuratedTweet(object):
+    """
+    Curated tweet record shipped to the curated firehose stream
+    """
+    __slots__ = ('time_stamp', 'tweet', 'tweet_id', 'sentiment', 'sentiment_details')
+
+    def __init__(self, time_stamp, tweet, tweet_id, sentiment=None, sentiment_details=None):
+        self.time_stamp = time_stamp
+        self.tweet = tweet
+        self.tweet_id = tweet_id
+        self.sentiment = sentiment
+        self.sentiment_details = sentiment_details
+
+    def as_dict(self):
+        return {
+            "time_stamp": self.time_stamp,
+            "tweet": self.tweet,
+            "tweet_id": self.tweet_id,
+            "sentiment": self.sentiment,
+            "sentiment_details": self.sentiment_details
+        }
+
+    def to_json(self):
+        return _encode_record(self.as_dict())
+
+
 class SentimentAnalysis(object):
 
     def __init__(self):
         self.FIREHOSE_STREAM = getenv("FIREHOSE_STREAM") or "NULL"
+        self.skipped = Counter()
+        self.truncated = 0
+
+    def validate_text(self, text):
+        # Returns the text comprehend should score, or a reason it shouldn't be scored at all
+        if not text.strip():
+            return None, "empty"
+        truncated = Comprehend.truncate_text(text)
+        if truncated != text:
+            self.truncated += 1
+        return truncated, None
 
     def get_sentiment(self, tweet):
-        response = Comprehend().sentiment(self.cleanup_tweet(tweet))
+        text, skip_reason = self.validate_text(self.cleanup_tweet(tweet))
+        if skip_reason is not None:
+            self.skipped[skip_reason] += 1
+            return UNSCORED, None
+        response = Comprehend().sentiment(text)
+        if response is None:
+            # Comprehend already logged why the call failed
+            return None, None
         try:
             sentiment = response['Sentiment']
             sentiment_score = response['SentimentScore']
@@ -36,49 +99,77 @@ class SentimentAnalysis(object):
         _date_updated = time.strptime(to_convert, '%a %b %d %H:%M:%S %z %Y') 
         return time.strftime('%d/%m/%Y %H:%M:%S', _date_updated)
 
-    def firehose(self, raw_tweet_data):
-        if raw_tweet_data.get('retweeted_status'):
-            created_date = raw_tweet_data.get('created_at')
-            tweet = raw_tweet_data['retweeted_status']['full_text']
-            tweet_id = raw_tweet_data['retweeted_status']['id']
-            tweet_length = len(tweet)
-        else:
-            created_date = raw_tweet_data.get('created_at')
-            tweet = raw_tweet_data['full_text']
-            tweet_id = raw_tweet_data['id']
-            tweet_length = len(tweet)
-
-        sentiment, sentiment_details = self.get_sentiment(tweet)
-        converted_timestamp = self.convert_datestamp(created_date)
-
-        stream_data = {
-            "time_stamp": converted_timestamp,
-            "tweet": tweet,
-            "tweet_id": tweet_id,
-            "sentiment": sentiment,
-            "sentiment_details": sentiment_details
-        }
+    def decode_tweet(self, raw_tweet_data):
+        # Prefer the original tweet's text and id for retweets, as the retweet text is truncated
+        source = raw_tweet_data.get('retweeted_status') or raw_tweet_data
+        return CuratedTweet(
+            time_stamp=self.convert_datestamp(raw_tweet_data.get('created_at')),
+            tweet=source['full_text'],
+            tweet_id=source['id']
+        )
+
+    def curate(self, raw_tweet_data):
+        # Scanning forward after a decode error can land on a string, number or array inside a broken record
+        if not isinstance(raw_tweet_data, dict):
+            print("ERROR: Decoded value is not a tweet, skipping: {}".format(repr(raw_tweet_data)[:100]))
+            return None
+        try:
+            record = self.decode_tweet(raw_tweet_data)
+        except (KeyError, TypeError, ValueError) as e:
+            # Skip malformed tweets rather than losing the records already batched
+            print("ERROR: Unable to decode tweet, skipping. ERROR: {}".format(repr(e)))
+            return None
+        record.sentiment, record.sentiment_details = self.get_sentiment(record.tweet)
+        if record.sentiment == UNSCORED:
+            return None
+        if record.sentiment is None:
+            print("ERROR: Unable to record sentiment. Stream data details: {}".format(record.as_dict()))
+            return None
+        return record
 
+    def firehose(self, raw_tweet_data):
         # Ship data to firehose which will put in curated s3 bucket
-        if sentiment is not None:
-            self.send_to_firehose(stream_data=stream_data)
-        else:
-            print("ERROR: Unable to record sentiment. Stream data details: {}".format(stream_data))
+        record = self.curate(raw_tweet_data)
+        if record is not None:
+            self.send_to_firehose(stream_data=record.as_dict())
+
+    def flush_batch(self, batch):
+        if batch:
+            FireHose().send_to_firehose_batch(firehose_stream_name=self.FIREHOSE_STREAM, records=batch)
+        return []
 
     def main(self, body):
-        decoder = json.JSONDecoder()
+        # Only the fields CuratedTweet needs survive decoding, nested user/entities objects are dropped as they're parsed
+        decoder = json.JSONDecoder(object_pairs_hook=prune_tweet_fields)
         decode_index = 0
-        tweet_data, _ = decoder.raw_decode(body, decode_index)
         content_length = len(body)
+        batch = []
+        batch_bytes = 0
         while decode_index < content_length:
             try:
                 tweet_data, decode_index = decoder.raw_decode(body, decode_index)
                 print("File index:", decode_index)
-                self.firehose(raw_tweet_data=tweet_data)
+                record = self.curate(raw_tweet_data=tweet_data)
             except JSONDecodeError as e:
                 print("JSONDecodeError:", e)
                 # Scan forward and keep trying to decode
                 decode_index += 1
+                continue
+
+            if record is None:
+                continue
+            data = record.to_json()
+            if len(batch) >= FIREHOSE_BATCH_RECORDS or batch_bytes + len(data) > FIREHOSE_BATCH_BYTES:
+                batch = self.flush_batch(batch)
+                batch_bytes = 0
+            batch.append(data)
+            batch_bytes += len(data)
+
+        self.flush_batch(batch)
+        if self.skipped:
+            print("Tweets not sent to comprehend: {}".format(dict(self.skipped)))
+        if self.truncated:
+            print("Tweets truncated to comprehend's size limit: {}".format(self.truncated))
 
 
 def lambda_handler(event, context):
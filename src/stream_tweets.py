@@ -3,6 +3,7 @@
 from time import sleep
 from os import getenv
 from aws import SecretsManager, Comprehend, FireHose, SQSQueue, SSMParameters
+from trends import TrendKeywords
 import twitter
 
 class TwitterCapture(object):
@@ -14,7 +15,9 @@ class TwitterCapture(object):
         self.param_name =  getenv("SSM_PARAM_INITIAL_RUN") or "NULL"
         self.since_date = getenv("SINCE_DATE") or '2019-03-01'
         self.twitter_term = getenv("TWITTER_KEYWORD") or 'maga'
+        self.trend_mode = (getenv("TREND_MODE") or "false").lower() == "true"
         self.api = self.instantiate_api()
+        self.trend_keywords = self.instantiate_trend_keywords()
 
     def instantiate_api(self):
         consumer_key, consumer_secret, access_token, access_token_secret = SecretsManager().setup_secrets()
@@ -25,8 +28,23 @@ class TwitterCapture(object):
                            tweet_mode='extended',
                            sleep_on_rate_limit=False)
 
+    def instantiate_trend_keywords(self):
+        if not self.trend_mode:
+            return None
+        return TrendKeywords(fetch_trends=lambda: self.get_trends(self.woe_id),
+                             pinned_keyword=self.twitter_term,
+                             max_keywords=int(getenv("TREND_MAX_KEYWORDS") or 5),
+                             refresh_interval=int(getenv("TREND_REFRESH_SECONDS") or 900),
+                             add_volume=int(getenv("TREND_ADD_VOLUME") or 10000),
+                             evict_volume=int(getenv("TREND_EVICT_VOLUME") or 5000))
+
     def get_trends(self, woe_id):
         return self.api.GetTrendsWoeid(woeid=woe_id)
+
+    def refresh_search_term(self):
+        # In trend mode, follow whatever is spiking for the WOEID alongside the configured keyword
+        if self.trend_keywords is not None:
+            self.twitter_term = self.trend_keywords.search_term()
     
     def search(self, since_date=None, result_type="recent", count=100, include_entities=False, last_item=None, retries=0):
         print("Searching twitter for term \'{}\', since date of \'{}\', and since last tweet id of \'{}\'".format(self.twitter_term, since_date, last_item))
@@ -104,6 +122,7 @@ class TwitterCapture(object):
                     pass
 
             _last_tweet = last_tweet_id
+            self.refresh_search_term()
 
             if _last_tweet is not None:
                 _search = self.search(last_item=int(_last_tweet))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+from time import time
+from urllib.parse import quote, unquote_plus
+
+# Standard search rejects queries whose URL-encoded form is longer than this
+MAX_QUERY_LENGTH = 500
+
+
+class TrendKeywords(object):
+    """
+    Keeps a capped working set of search keywords that follow the trends for a WOEID.
+
+    Trends are fetched at most once per refresh interval and cached in between, so the
+    trends API is hit on a fixed budget. Keywords are added once their tweet volume clears
+    the add threshold and only evicted after they stay below the (lower) evict threshold
+    for several refreshes in a row, so the set doesn't flap on noisy volumes.
+    """
+
+    def __init__(self, fetch_trends, pinned_keyword=None, max_keywords=5, refresh_interval=900,
+                 add_volume=10000, evict_volume=5000, evict_after=2, retry_interval=60):
+        if max_keywords < 1:
+            raise ValueError("max_keywords ({}) must be at least 1".format(max_keywords))
+        if evict_volume > add_volume:
+            raise ValueError("evict_volume ({}) must not be greater than add_volume ({})".format(evict_volume, add_volume))
+        self.fetch_trends = fetch_trends
+        self.pinned_keyword = pinned_keyword
+        self.max_keywords = max_keywords
+        self.refresh_interval = refresh_interval
+        self.add_volume = add_volume
+        self.evict_volume = evict_volume
+        self.evict_after = evict_after
+        self.retry_interval = retry_interval
+        self.active = {}
+        self.misses = {}
+        self.cached_trends = []
+        self.next_refresh = 0
+
+    def trends(self):
+        # Serve the cached trends response until the refresh interval has elapsed
+        now = time()
+        if now < self.next_refresh:
+            return self.cached_trends, False
+        try:
+            self.cached_trends = self.fetch_trends() or []
+        except Exception as e:
+            # Only real responses move keywords toward eviction, so try again sooner without updating
+            print("WARNING: Unable to fetch trends, keeping current keywords. ERROR: {}".format(e))
+            self.next_refresh = now + self.retry_interval
+            return self.cached_trends, False
+        self.next_refresh = now + self.refresh_interval
+        return self.cached_trends, True
+
+    def keyword(self, trend):
+        # The trends API returns query URL-encoded, and GetSearch encodes the term again
+        if trend.query:
+            return unquote_plus(trend.query)
+        if trend.name and ' ' in trend.name:
+            return '"{}"'.format(trend.name)
+        return trend.name
+
+    def score(self, trends):
+        # Score trends by tweet volume, trends without a reported volume score zero
+        scores = {}
+        for trend in trends:
+            keyword = self.keyword(trend)
+            if keyword:
+                scores[keyword] = max(scores.get(keyword, 0), trend.tweet_volume or 0)
+        return scores
+
+    def update(self, scores):
+        # Evict keywords that stayed below the evict threshold for long enough
+        for keyword in list(self.active):
+            volume = scores.get(keyword, 0)
+            self.active[keyword] = volume
+            if volume >= self.evict_volume:
+                self.misses[keyword] = 0
+                continue
+            self.misses[keyword] = self.misses.get(keyword, 0) + 1
+            if self.misses[keyword] >= self.evict_after:
+                print("Evicting trend keyword \'{}\', volume {}".format(keyword, volume))
+                del self.active[keyword]
+                del self.misses[keyword]
+
+        # Add the hottest candidates that clear the add threshold, displacing a weaker
+        # active keyword only when the candidate also beats its add threshold
+        candidates = sorted(
+            ((volume, keyword) for keyword, volume in scores.items() if keyword not in self.active and volume >= self.add_volume),
+            reverse=True
+        )
+        for volume, keyword in candidates:
+            if len(self.active) >= self.max_keywords:
+                weakest = min(self.active, key=self.active.get)
+                if self.active[weakest] >= self.add_volume or volume <= self.active[weakest]:
+                    break
+                print("Evicting trend keyword \'{}\' in favor of \'{}\'".format(weakest, keyword))
+                del self.active[weakest]
+                self.misses.pop(weakest, None)
+            print("Adding trend keyword \'{}\', volume {}".format(keyword, volume))
+            self.active[keyword] = volume
+            self.misses[keyword] = 0
+
+    def keywords(self):
+        trends, refreshed = self.trends()
+        if refreshed:
+            self.update(self.score(trends))
+        keywords = sorted(self.active, key=self.active.get, reverse=True)
+        if self.pinned_keyword and self.pinned_keyword not in keywords:
+            keywords.insert(0, self.pinned_keyword)
+        return keywords
+
+    def search_term(self):
+        # A single OR query keeps search calls per loop fixed regardless of the working set,
+        # dropping the weakest keywords until its encoded form fits the search query limit
+        keywords = self.keywords()
+        while len(keywords) > 1 and len(quote(' OR '.join(keywords))) > MAX_QUERY_LENGTH:
+            keywords.pop()
+        return ' OR '.join(keywords)